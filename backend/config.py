@@ -23,6 +23,27 @@ class Settings(BaseSettings):
     funasr_port: int = 10096
     funasr_use_ssl: bool = False
     
+    # 音频预处理配置
+    audio_dsp_enabled: bool = True
+    audio_dc_removal: bool = True
+    audio_noise_reduction: bool = True
+    audio_noise_reduction_db: float = 12.0
+    audio_agc: bool = True
+    audio_agc_target_dbfs: float = -20.0
+    audio_agc_max_gain_db: float = 20.0
+    
+    # 会话准入控制配置
+    max_concurrent_sessions: int = 50
+    max_sessions_per_tenant: int = 10
+    admission_queue_size: int = 100
+    admission_queue_timeout: float = 60.0
+    
+    # 单会话音频限速配置（16kHz 16bit单声道约为32000字节/秒）
+    audio_rate_limit_bytes_per_sec: int = 64000
+    audio_rate_burst_bytes: int = 64000
+    # 连续超速超过该秒数则断开会话
+    audio_rate_max_overrun: float = 5.0
+    
     class Config:
         env_file = ".env"
 
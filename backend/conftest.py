@@ -0,0 +1 @@
+# pytest根目录配置：将backend目录加入导入路径，使测试可直接导入services等模块
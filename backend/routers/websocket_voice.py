@@ -19,6 +19,9 @@ import io
 import threading
 from datetime import datetime
 from services.funasr_service import FunASRService, funasr_manager
+from services.audio_dsp import AudioDSPChain
+from services.admission_control import AdmissionController, AdmissionRejected, TokenBucket
+from config import settings
 
 # 配置日志
 logging.basicConfig(level=logging.INFO)
@@ -35,18 +38,19 @@ class ConnectionManager:
         self.client_funasr_services: Dict[str, FunASRService] = {}
         
     async def connect(self, websocket: WebSocket, client_id: str):
-        await websocket.accept()
+        # WebSocket已在准入控制前accept，这里只登记连接
         self.active_connections[client_id] = websocket
         logger.info(f"客户端 {client_id} 已连接")
         
     async def disconnect(self, client_id: str):
-        if client_id in self.active_connections:
-            del self.active_connections[client_id]
+        # 先同步移除登记，避免等待FunASR关闭握手期间误删同ID新连接的条目
+        self.active_connections.pop(client_id, None)
+        service = self.client_funasr_services.pop(client_id, None)
+        funasr_manager.services.pop(client_id, None)
             
         # 清理FunASR服务
-        if client_id in self.client_funasr_services:
-            await self.client_funasr_services[client_id].disconnect()
-            del self.client_funasr_services[client_id]
+        if service:
+            await service.disconnect()
             
         logger.info(f"客户端 {client_id} 已断开连接")
         
@@ -134,6 +138,14 @@ class ConnectionManager:
 
 manager = ConnectionManager()
 
+# 会话准入控制器
+admission_controller = AdmissionController(
+    max_sessions=settings.max_concurrent_sessions,
+    max_sessions_per_tenant=settings.max_sessions_per_tenant,
+    max_queue_size=settings.admission_queue_size,
+    queue_timeout=settings.admission_queue_timeout
+)
+
 
 
 # 音频处理类
@@ -143,14 +155,33 @@ class AudioProcessor:
         self.channels = 1
         self.chunk_size = 1024
         self.format = pyaudio.paInt16
+        # 每个客户端独立的DSP处理链，保证跨音频块的状态连续
+        self.session_chains: Dict[str, AudioDSPChain] = {}
+        
+    def _get_chain(self, client_id: str) -> AudioDSPChain:
+        """获取或创建客户端的DSP处理链"""
+        if client_id not in self.session_chains:
+            self.session_chains[client_id] = AudioDSPChain(
+                sample_rate=self.sample_rate,
+                dc_removal=settings.audio_dc_removal,
+                noise_reduction=settings.audio_noise_reduction,
+                noise_reduction_db=settings.audio_noise_reduction_db,
+                agc=settings.audio_agc,
+                agc_target_dbfs=settings.audio_agc_target_dbfs,
+                agc_max_gain_db=settings.audio_agc_max_gain_db
+            )
+        return self.session_chains[client_id]
+        
+    def release_session(self, client_id: str):
+        """释放客户端的DSP处理状态"""
+        self.session_chains.pop(client_id, None)
         
-    def process_audio_chunk(self, audio_data: bytes) -> Optional[bytes]:
-        """处理音频块数据"""
+    def process_audio_chunk(self, audio_data: bytes, client_id: str) -> Optional[bytes]:
+        """处理音频块数据：去直流、降噪、自动增益"""
         try:
-            # 这里可以添加音频预处理逻辑
-            # 比如降噪、音量调整等
-            # 记录音频数据大小到控制台
-            return audio_data
+            if not settings.audio_dsp_enabled:
+                return audio_data
+            return self._get_chain(client_id).process(audio_data)
         except Exception as e:
             logger.error(f"音频处理错误: {e}")
             return None
@@ -173,20 +204,110 @@ class AudioProcessor:
 
 audio_processor = AudioProcessor()
 
+# 准入被拒绝时WebSocket关闭帧的原因
+ADMISSION_CLOSE_REASONS = {
+    "duplicate_session": "会话ID已在使用中",
+    "capacity_exhausted": "服务容量已满",
+    "queue_timeout": "排队等待超时"
+}
+
+
+async def wait_for_admission(websocket: WebSocket, client_id: str, tenant_id: Optional[str]) -> bool:
+    """
+    排队等待会话准入，同时监听客户端消息
+    排队期间收到的音频直接丢弃，避免准入后延迟回放；客户端断开时立即让出排队位置
+    
+    Returns:
+        准入成功返回True，客户端在排队期间断开返回False
+    
+    Raises:
+        AdmissionRejected: 准入被拒绝
+    """
+    async def send_queue_position(position: int):
+        await websocket.send_text(json.dumps({
+            "type": "admission_status",
+            "status": "queued",
+            "position": position,
+            "message": f"语音识别服务繁忙，排队中，当前位置: {position}"
+        }))
+    
+    acquire_task = asyncio.create_task(
+        admission_controller.acquire(client_id, tenant_id, on_position=send_queue_position)
+    )
+    receive_task = None
+    admitted = False
+    try:
+        while True:
+            receive_task = asyncio.create_task(websocket.receive())
+            done, _ = await asyncio.wait({acquire_task, receive_task}, return_when=asyncio.FIRST_COMPLETED)
+            
+            if receive_task in done and receive_task.result()["type"] == "websocket.disconnect":
+                logger.info(f"客户端 {client_id} 在排队期间断开连接")
+                return False
+            
+            if acquire_task in done:
+                acquire_task.result()
+                admitted = True
+                return True
+    finally:
+        if receive_task is not None and not receive_task.done():
+            receive_task.cancel()
+        if not admitted:
+            # 任何未成功准入的退出路径都要撤销排队；若恰好已被准入则归还名额
+            acquire_task.cancel()
+            try:
+                await acquire_task
+                admission_controller.release(client_id)
+            except (asyncio.CancelledError, AdmissionRejected):
+                pass
+
+
 @router.websocket("/ws/voice/stream/{client_id}")
-async def websocket_voice_stream(websocket: WebSocket, client_id: str):
+async def websocket_voice_stream(websocket: WebSocket, client_id: str, tenant_id: Optional[str] = None):
     """
     统一WebSocket接口: 音频流处理与语音识别
     功能包括：
-    1. 接收前端发送的音频字节流
-    2. 通过FunASR进行实时语音识别
-    3. 将语音转文字结果实时返回给前端
-    4. 支持语音分析结果返回（可扩展）
+    1. 会话准入控制，容量不足时排队并推送排队位置
+    2. 接收前端发送的音频字节流（按会话限速）
+    3. 通过FunASR进行实时语音识别
+    4. 将语音转文字结果实时返回给前端
+    5. 支持语音分析结果返回（可扩展）
+    
+    tenant_id为客户端自行提供的查询参数，单租户上限仅为建议性限制
     """
-    await manager.connect(websocket, client_id)
+    await websocket.accept()
+    
+    # 在占用名额之前创建限速器，配置错误时不会泄漏名额
+    rate_limiter = TokenBucket(
+        rate=settings.audio_rate_limit_bytes_per_sec,
+        capacity=settings.audio_rate_burst_bytes
+    )
+    
+    try:
+        if not await wait_for_admission(websocket, client_id, tenant_id):
+            return
+    except AdmissionRejected as e:
+        logger.warning(f"客户端 {client_id} 准入被拒绝: {e.reason}")
+        await websocket.send_text(json.dumps({
+            "type": "admission_status",
+            "status": "rejected",
+            "reason": e.reason,
+            "message": e.message,
+            "timestamp": datetime.now().isoformat()
+        }))
+        await websocket.close(code=1013, reason=ADMISSION_CLOSE_REASONS.get(e.reason, "会话准入被拒绝"))
+        return
+    
     funasr_service = None
     
     try:
+        await manager.connect(websocket, client_id)
+        await websocket.send_text(json.dumps({
+            "type": "admission_status",
+            "status": "admitted",
+            "message": "已获得语音识别会话名额"
+        }))
+        
         # 发送连接成功消息
         await websocket.send_text(json.dumps({
             "type": "connection_status",
@@ -221,8 +342,22 @@ async def websocket_voice_stream(websocket: WebSocket, client_id: str):
             # 接收音频数据
             data = await websocket.receive_bytes()
             
+            # 音频字节流限速：超速时延迟处理，连续超速超过阈值则断开
+            delay = rate_limiter.consume(len(data))
+            if rate_limiter.overrun_duration() > settings.audio_rate_max_overrun:
+                logger.warning(f"客户端 {client_id} 音频发送速率超出限制")
+                await websocket.send_text(json.dumps({
+                    "type": "error",
+                    "message": "音频发送速率超出限制",
+                    "timestamp": datetime.now().isoformat()
+                }))
+                await websocket.close(code=1008, reason="音频发送速率超出限制")
+                break
+            if delay > 0:
+                await asyncio.sleep(delay)
+            
             # 处理音频数据
-            processed_audio = audio_processor.process_audio_chunk(data)
+            processed_audio = audio_processor.process_audio_chunk(data, client_id)
             if processed_audio:
                 # 使用FunASR进行实时识别
                 success = await funasr_service.send_audio_chunk(processed_audio)
@@ -236,11 +371,17 @@ async def websocket_voice_stream(websocket: WebSocket, client_id: str):
                     break
                 
     except WebSocketDisconnect:
-        await manager.disconnect(client_id)
         logger.info(f"客户端 {client_id} 断开连接")
     except Exception as e:
         logger.error(f"WebSocket错误: {e}")
-        await manager.disconnect(client_id)
+    finally:
+        # 先释放名额与预处理状态，不等待FunASR关闭握手，也不受其异常影响
+        admission_controller.release(client_id)
+        audio_processor.release_session(client_id)
+        try:
+            await manager.disconnect(client_id)
+        except Exception as e:
+            logger.error(f"清理客户端 {client_id} 连接失败: {e}")
 
 
 
@@ -253,6 +394,7 @@ async def voice_health_check():
         "service_type": "unified_websocket",
         "active_connections": len(manager.active_connections),
         "funasr_sessions": len(manager.client_funasr_services),
+        "admission": admission_controller.get_stats(),
         "features": ["audio_stream", "speech_to_text", "real_time_analysis"],
         "timestamp": datetime.now().isoformat()
     }
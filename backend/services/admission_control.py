@@ -0,0 +1,224 @@
+"""
+语音会话准入控制模块
+在创建FunASR会话之前进行容量控制：
+1. 全局及单租户并发会话上限
+2. 超出容量时进入等待队列，并推送排队位置
+3. 每个会话的音频字节流令牌桶限速
+
+注意：租户ID由客户端自行提供且未经认证，单租户上限仅为建议性限制，
+客户端可通过更换租户ID绕过；全局上限才是硬性保护。
+未提供租户ID的会话只受全局上限约束。
+"""
+
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+PositionCallback = Callable[[int], Awaitable[None]]
+
+
+class AdmissionRejected(Exception):
+    """会话准入被拒绝"""
+
+    def __init__(self, reason: str, message: str):
+        super().__init__(message)
+        self.reason = reason
+        self.message = message
+
+
+class TokenBucket:
+    """令牌桶限速器，按字节计量"""
+
+    def __init__(self, rate: float, capacity: float):
+        """
+        Args:
+            rate: 每秒补充的令牌数(字节/秒)
+            capacity: 桶容量，即允许的突发字节数
+        """
+        if rate <= 0 or capacity <= 0:
+            raise ValueError("令牌桶的速率和容量必须为正数")
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.last_refill = time.monotonic()
+        # 连续超速（令牌透支）的起始时间
+        self.overrun_since: Optional[float] = None
+
+    def consume(self, amount: int) -> float:
+        """
+        消耗令牌，允许透支
+
+        Returns:
+            需要等待的秒数，令牌充足时为0
+        """
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+        self.last_refill = now
+        self.tokens -= amount
+        if self.tokens >= 0:
+            self.overrun_since = None
+            return 0.0
+        if self.overrun_since is None:
+            self.overrun_since = now
+        return -self.tokens / self.rate
+
+    def overrun_duration(self) -> float:
+        """当前连续超速的持续时间(秒)，未超速时为0"""
+        if self.overrun_since is None:
+            return 0.0
+        return time.monotonic() - self.overrun_since
+
+
+class _Waiter:
+    """排队中的会话"""
+
+    def __init__(self, client_id: str, tenant_id: Optional[str], on_position: Optional[PositionCallback]):
+        self.client_id = client_id
+        self.tenant_id = tenant_id
+        self.on_position = on_position
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.last_position = 0
+
+
+class AdmissionController:
+    """语音会话准入控制器"""
+
+    def __init__(self,
+                 max_sessions: int = 50,
+                 max_sessions_per_tenant: int = 10,
+                 max_queue_size: int = 100,
+                 queue_timeout: float = 60.0):
+        """
+        初始化准入控制器
+
+        Args:
+            max_sessions: 全局最大并发会话数
+            max_sessions_per_tenant: 单租户最大并发会话数
+            max_queue_size: 等待队列最大长度
+            queue_timeout: 排队最长等待时间(秒)
+        """
+        self.max_sessions = max_sessions
+        self.max_sessions_per_tenant = max_sessions_per_tenant
+        self.max_queue_size = max_queue_size
+        self.queue_timeout = queue_timeout
+
+        self.active_sessions: Dict[str, Optional[str]] = {}
+        self.tenant_sessions: Dict[str, int] = {}
+        self.waiters: List[_Waiter] = []
+        # 持有位置推送任务的引用，防止任务在执行前被垃圾回收
+        self._position_tasks: Set[asyncio.Task] = set()
+
+    def _can_admit(self, tenant_id: Optional[str]) -> bool:
+        if len(self.active_sessions) >= self.max_sessions:
+            return False
+        return tenant_id is None or self.tenant_sessions.get(tenant_id, 0) < self.max_sessions_per_tenant
+
+    def _admit(self, client_id: str, tenant_id: Optional[str]):
+        self.active_sessions[client_id] = tenant_id
+        if tenant_id is not None:
+            self.tenant_sessions[tenant_id] = self.tenant_sessions.get(tenant_id, 0) + 1
+        logger.info(f"会话已准入: {client_id} (租户: {tenant_id}, 活跃会话: {len(self.active_sessions)})")
+
+    def _is_known(self, client_id: str) -> bool:
+        return client_id in self.active_sessions or any(w.client_id == client_id for w in self.waiters)
+
+    def _dispatch(self):
+        """按先进先出顺序准入可容纳的排队会话，租户已满的会话不阻塞其他租户"""
+        remaining = []
+        for waiter in self.waiters:
+            if not waiter.future.done() and self._can_admit(waiter.tenant_id):
+                self._admit(waiter.client_id, waiter.tenant_id)
+                waiter.future.set_result(True)
+            elif not waiter.future.done():
+                remaining.append(waiter)
+        self.waiters = remaining
+        self._notify_positions()
+
+    def _notify_positions(self):
+        """向排队位置发生变化的会话推送最新位置"""
+        for index, waiter in enumerate(self.waiters):
+            position = index + 1
+            if waiter.on_position and waiter.last_position != position:
+                waiter.last_position = position
+                task = asyncio.create_task(self._send_position(waiter, position))
+                self._position_tasks.add(task)
+                task.add_done_callback(self._position_tasks.discard)
+
+    async def _send_position(self, waiter: _Waiter, position: int):
+        try:
+            await waiter.on_position(position)
+        except Exception as e:
+            logger.error(f"推送排队位置失败 [{waiter.client_id}]: {e}")
+
+    async def acquire(self, client_id: str, tenant_id: Optional[str] = None,
+                      on_position: Optional[PositionCallback] = None):
+        """
+        申请会话名额，容量不足时排队等待
+
+        Args:
+            client_id: 客户端ID
+            tenant_id: 租户ID，为None时不受单租户上限约束
+            on_position: 排队位置变化时的回调
+
+        Raises:
+            AdmissionRejected: 会话ID重复、队列已满或排队超时
+        """
+        if self._is_known(client_id):
+            raise AdmissionRejected("duplicate_session", f"会话ID {client_id} 已在使用中")
+
+        if self._can_admit(tenant_id) and not self.waiters:
+            self._admit(client_id, tenant_id)
+            return
+
+        if len(self.waiters) >= self.max_queue_size:
+            raise AdmissionRejected("capacity_exhausted", "语音识别服务繁忙，请稍后再试")
+
+        waiter = _Waiter(client_id, tenant_id, on_position)
+        self.waiters.append(waiter)
+        logger.info(f"会话进入等待队列: {client_id} (租户: {tenant_id}, 队列长度: {len(self.waiters)})")
+        self._dispatch()
+
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._remove_waiter(waiter)
+            raise AdmissionRejected("queue_timeout", "排队等待超时，请稍后再试")
+        except asyncio.CancelledError:
+            self._remove_waiter(waiter)
+            raise
+
+    def _remove_waiter(self, waiter: _Waiter):
+        """移除排队会话；若已在竞争中被准入，则归还名额"""
+        if waiter.future.done():
+            self.release(waiter.client_id)
+            return
+        waiter.future.cancel()
+        if waiter in self.waiters:
+            self.waiters.remove(waiter)
+            self._notify_positions()
+
+    def release(self, client_id: str):
+        """释放会话名额并准入排队中的会话"""
+        if client_id not in self.active_sessions:
+            return
+        tenant_id = self.active_sessions.pop(client_id)
+        if tenant_id is not None:
+            self.tenant_sessions[tenant_id] -= 1
+            if self.tenant_sessions[tenant_id] <= 0:
+                del self.tenant_sessions[tenant_id]
+        logger.info(f"会话已释放: {client_id} (租户: {tenant_id}, 活跃会话: {len(self.active_sessions)})")
+        self._dispatch()
+
+    def get_stats(self) -> dict:
+        """获取准入控制统计信息"""
+        return {
+            "active_sessions": len(self.active_sessions),
+            "max_sessions": self.max_sessions,
+            "max_sessions_per_tenant": self.max_sessions_per_tenant,
+            "tenant_sessions": dict(self.tenant_sessions),
+            "queue_length": len(self.waiters),
+            "max_queue_size": self.max_queue_size
+        }
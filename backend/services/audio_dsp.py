@@ -0,0 +1,233 @@
+"""
+流式音频预处理模块
+为FunASR识别前的PCM音频提供向量化DSP处理链：
+1. 直流偏置去除 (DC removal)
+2. 频谱门限降噪 (spectral gating)
+3. 自动增益控制 (AGC)
+每个会话持有独立的处理状态，跨音频块连续处理
+"""
+
+import logging
+import time
+from typing import Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+INT16_MAX = 32767.0
+
+
+class AudioDSPChain:
+    """单会话流式DSP处理链，输入输出均为16bit单声道PCM"""
+
+    def __init__(self,
+                 sample_rate: int = 16000,
+                 frame_ms: int = 20,
+                 dc_removal: bool = True,
+                 dc_time_constant_ms: float = 500.0,
+                 noise_reduction: bool = True,
+                 noise_reduction_db: float = 12.0,
+                 noise_gate_ratio: float = 2.0,
+                 agc: bool = True,
+                 agc_target_dbfs: float = -20.0,
+                 agc_max_gain_db: float = 20.0,
+                 agc_min_gain_db: float = -10.0):
+        """
+        初始化DSP处理链
+
+        Args:
+            sample_rate: 采样率
+            frame_ms: 降噪分析帧长(毫秒)，帧移为帧长的一半
+            dc_removal: 是否去除直流偏置
+            dc_time_constant_ms: 直流估计的平滑时间常数(毫秒)
+            noise_reduction: 是否启用频谱门限降噪
+            noise_reduction_db: 噪声频点的最大衰减量(dB)
+            noise_gate_ratio: 判定为语音的信号/噪声功率比
+            agc: 是否启用自动增益控制
+            agc_target_dbfs: AGC目标电平(dBFS)
+            agc_max_gain_db: AGC最大增益(dB)
+            agc_min_gain_db: AGC最小增益(dB)
+        """
+        self.sample_rate = sample_rate
+        self.dc_removal = dc_removal
+        self.noise_reduction = noise_reduction
+        self.agc = agc
+
+        # 直流去除状态
+        self._dc_tau_samples = max(dc_time_constant_ms * sample_rate / 1000.0, 1.0)
+        self._dc_offset = 0.0
+
+        # 降噪参数：sqrt-Hann窗在50%重叠下分析/合成可完美重建
+        self.frame_length = int(sample_rate * frame_ms / 1000) // 2 * 2
+        self.hop_length = self.frame_length // 2
+        self._window = np.sqrt(np.hanning(self.frame_length + 1)[:-1]).astype(np.float32)
+        self._gain_floor = float(10 ** (-noise_reduction_db / 20))
+        self._gate_ratio = noise_gate_ratio
+        n_bins = self.frame_length // 2 + 1
+        self._noise_psd: Optional[np.ndarray] = None
+        self._prev_mask = np.ones(n_bins, dtype=np.float32)
+        # 预填充半帧零值，使输出与输入保持固定的hop_length延迟
+        self._input_buffer = np.zeros(self.frame_length - self.hop_length, dtype=np.float32)
+        self._overlap = np.zeros(self.frame_length - self.hop_length, dtype=np.float32)
+
+        # AGC状态
+        self._agc_target_rms = float(10 ** (agc_target_dbfs / 20))
+        self._agc_max_gain = float(10 ** (agc_max_gain_db / 20))
+        self._agc_min_gain = float(10 ** (agc_min_gain_db / 20))
+        self._agc_gain = 1.0
+        self._agc_silence_rms = float(10 ** (-50 / 20))
+        # 块级噪声底噪估计，用于区分语音块与噪声块，避免在停顿期间放大背景噪声
+        self._agc_noise_rms: Optional[float] = None
+        self._agc_speech_ratio = float(10 ** (6 / 20))
+
+        # 奇数字节输入时残留的半个采样点
+        self._pending_byte = b""
+
+    def process(self, audio_data: bytes) -> bytes:
+        """处理一个PCM音频块，返回处理后的PCM数据（可能为空）"""
+        data = self._pending_byte + audio_data
+        usable = len(data) - len(data) % 2
+        self._pending_byte = data[usable:]
+        if usable == 0:
+            return b""
+
+        samples = np.frombuffer(data[:usable], dtype="<i2").astype(np.float32) / INT16_MAX
+
+        if self.dc_removal:
+            samples = self._remove_dc(samples)
+        if self.noise_reduction:
+            samples = self._spectral_gate(samples)
+        if self.agc and samples.size:
+            samples = self._apply_agc(samples)
+
+        if not samples.size:
+            return b""
+        return np.rint(np.clip(samples, -1.0, 1.0) * INT16_MAX).astype("<i2").tobytes()
+
+    def _remove_dc(self, samples: np.ndarray) -> np.ndarray:
+        """以块均值的指数平滑估计直流偏置并减去"""
+        alpha = float(np.exp(-samples.size / self._dc_tau_samples))
+        self._dc_offset = alpha * self._dc_offset + (1 - alpha) * float(samples.mean())
+        return samples - self._dc_offset
+
+    def _spectral_gate(self, samples: np.ndarray) -> np.ndarray:
+        """STFT频谱门限降噪，按帧移输出，余下不足一帧移的采样留到下一块"""
+        buffer = np.concatenate((self._input_buffer, samples))
+        n_frames = (buffer.size - self.frame_length) // self.hop_length + 1
+        if n_frames <= 0:
+            self._input_buffer = buffer
+            return np.zeros(0, dtype=np.float32)
+
+        frames = np.lib.stride_tricks.sliding_window_view(buffer, self.frame_length)[::self.hop_length][:n_frames]
+        spectrum = np.fft.rfft(frames * self._window, axis=1)
+        power = spectrum.real ** 2 + spectrum.imag ** 2
+
+        masks = np.empty_like(power, dtype=np.float32)
+        if self._noise_psd is None:
+            self._noise_psd = power[0].copy()
+        noise_psd = self._noise_psd
+        prev_mask = self._prev_mask
+        for i in range(n_frames):
+            frame_power = power[i]
+            # 噪声底噪估计：下降快速跟踪，上升缓慢跟踪，避免语音抬高噪声估计
+            noise_psd = np.where(frame_power < noise_psd,
+                                 0.7 * noise_psd + 0.3 * frame_power,
+                                 0.995 * noise_psd + 0.005 * frame_power)
+            snr = frame_power / (noise_psd * self._gate_ratio + 1e-12)
+            mask = np.clip(1.0 - 1.0 / (snr + 1e-12), self._gain_floor, 1.0)
+            # 时间方向平滑掩码，抑制音乐噪声
+            prev_mask = 0.6 * mask + 0.4 * prev_mask
+            masks[i] = prev_mask
+        self._noise_psd = noise_psd
+        self._prev_mask = prev_mask
+
+        processed = np.fft.irfft(spectrum * masks, n=self.frame_length, axis=1).astype(np.float32)
+        processed *= self._window
+
+        # 重叠相加
+        overlap_len = self.frame_length - self.hop_length
+        output = np.zeros((n_frames + 1) * self.hop_length, dtype=np.float32)
+        output[:overlap_len] += self._overlap
+        for i in range(n_frames):
+            start = i * self.hop_length
+            output[start:start + self.frame_length] += processed[i]
+
+        out_len = n_frames * self.hop_length
+        self._overlap = output[out_len:out_len + overlap_len].copy()
+        self._input_buffer = buffer[out_len:].copy()
+        return output[:out_len]
+
+    def _is_speech(self, rms: float) -> bool:
+        """以块RMS相对噪声底噪的比值判断是否为语音块，并更新底噪估计"""
+        if self._agc_noise_rms is None:
+            self._agc_noise_rms = rms
+            return False
+        is_speech = rms > self._agc_silence_rms and rms > self._agc_noise_rms * self._agc_speech_ratio
+        # 底噪估计：下降快速跟踪，上升缓慢跟踪
+        if rms < self._agc_noise_rms:
+            self._agc_noise_rms = 0.7 * self._agc_noise_rms + 0.3 * rms
+        else:
+            self._agc_noise_rms = 0.995 * self._agc_noise_rms + 0.005 * rms
+        return is_speech
+
+    def _apply_agc(self, samples: np.ndarray) -> np.ndarray:
+        """按块RMS调整增益，仅在语音块上更新，块内线性插值过渡以避免增益突变，并按峰值限幅防止削波"""
+        rms = float(np.sqrt(np.mean(samples * samples)))
+        target_gain = self._agc_gain
+        if self._is_speech(rms):
+            desired = min(max(self._agc_target_rms / rms, self._agc_min_gain), self._agc_max_gain)
+            # 降增益快(attack)，升增益慢(release)
+            coeff = 0.5 if desired < self._agc_gain else 0.1
+            target_gain = self._agc_gain + coeff * (desired - self._agc_gain)
+        elif self._agc_gain > 1.0:
+            # 噪声块：增益缓慢回落到单位增益，不放大停顿期间的背景噪声
+            target_gain = self._agc_gain + 0.05 * (1.0 - self._agc_gain)
+
+        gains = np.linspace(self._agc_gain, target_gain, samples.size, endpoint=False, dtype=np.float32)
+        # 峰值限幅：突然变响时立即压低增益，避免沿用上一块的高增益导致削波
+        peak = float(np.max(np.abs(samples)))
+        if peak > 0:
+            peak_limit = 0.99 / peak
+            np.minimum(gains, peak_limit, out=gains)
+            target_gain = min(target_gain, peak_limit)
+        self._agc_gain = target_gain
+        return samples * gains
+
+
+def benchmark(duration_s: float = 10.0, chunk_samples: int = 960, sample_rate: int = 16000) -> dict:
+    """
+    单核基准测试：处理合成的带噪语音信号
+
+    Returns:
+        包含每秒处理帧数、每块平均耗时和实时率的字典
+    """
+    rng = np.random.default_rng(0)
+    t = np.arange(int(duration_s * sample_rate)) / sample_rate
+    signal = 0.1 * np.sin(2 * np.pi * 220 * t) * (np.sin(2 * np.pi * 0.5 * t) > 0)
+    signal += 0.02 * rng.standard_normal(t.size) + 0.05
+    pcm = np.rint(np.clip(signal, -1, 1) * INT16_MAX).astype("<i2").tobytes()
+
+    chain = AudioDSPChain(sample_rate=sample_rate)
+    chunk_bytes = chunk_samples * 2
+    chunks = [pcm[i:i + chunk_bytes] for i in range(0, len(pcm), chunk_bytes)]
+
+    start = time.perf_counter()
+    for chunk in chunks:
+        chain.process(chunk)
+    elapsed = time.perf_counter() - start
+
+    total_frames = len(pcm) // 2
+    return {
+        "frames_per_sec": total_frames / elapsed,
+        "chunks_per_sec": len(chunks) / elapsed,
+        "ms_per_chunk": elapsed * 1000 / len(chunks),
+        "realtime_factor": duration_s / elapsed,
+    }
+
+
+if __name__ == "__main__":
+    result = benchmark()
+    print(f"处理速度: {result['frames_per_sec']:.0f} frames/sec (单核)")
+    print(f"每块耗时: {result['ms_per_chunk']:.3f} ms")
+    print(f"实时倍率: {result['realtime_factor']:.1f}x")
@@ -0,0 +1,177 @@
+"""
+会话准入控制与令牌桶限速测试
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from services.admission_control import AdmissionController, AdmissionRejected, TokenBucket
+
+
+async def _settle():
+    """让出事件循环，使排队任务与位置推送得以执行"""
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+
+def test_admits_up_to_global_limit_then_queues_fifo():
+    async def scenario():
+        controller = AdmissionController(max_sessions=1, max_queue_size=5, queue_timeout=5)
+        await controller.acquire("a")
+        order = []
+
+        async def waiter(client_id):
+            await controller.acquire(client_id)
+            order.append(client_id)
+
+        tasks = [asyncio.create_task(waiter("b")), asyncio.create_task(waiter("c"))]
+        await _settle()
+        assert controller.get_stats()["queue_length"] == 2
+
+        controller.release("a")
+        await _settle()
+        assert order == ["b"]
+        controller.release("b")
+        await asyncio.gather(*tasks)
+        assert order == ["b", "c"]
+
+    asyncio.run(scenario())
+
+
+def test_queue_positions_are_pushed():
+    async def scenario():
+        controller = AdmissionController(max_sessions=1, queue_timeout=5)
+        await controller.acquire("a")
+        positions = {"b": [], "c": []}
+
+        def recorder(client_id):
+            async def on_position(position):
+                positions[client_id].append(position)
+            return on_position
+
+        tasks = [asyncio.create_task(controller.acquire(cid, on_position=recorder(cid))) for cid in ("b", "c")]
+        await _settle()
+        controller.release("a")
+        await _settle()
+
+        assert positions == {"b": [1], "c": [2, 1]}
+        controller.release("b")
+        await asyncio.gather(*tasks)
+
+    asyncio.run(scenario())
+
+
+def test_full_tenant_does_not_block_other_tenants():
+    async def scenario():
+        controller = AdmissionController(max_sessions=3, max_sessions_per_tenant=1, queue_timeout=5)
+        await controller.acquire("a1", "tenant-a")
+        blocked = asyncio.create_task(controller.acquire("a2", "tenant-a"))
+        await _settle()
+
+        await asyncio.wait_for(controller.acquire("b1", "tenant-b"), timeout=1)
+        assert not blocked.done()
+
+        controller.release("a1")
+        await asyncio.wait_for(blocked, timeout=1)
+        assert controller.get_stats()["tenant_sessions"] == {"tenant-a": 1, "tenant-b": 1}
+
+    asyncio.run(scenario())
+
+
+def test_sessions_without_tenant_only_use_global_limit():
+    async def scenario():
+        controller = AdmissionController(max_sessions=50, max_sessions_per_tenant=10)
+        for i in range(50):
+            await asyncio.wait_for(controller.acquire(f"client-{i}"), timeout=1)
+        assert controller.get_stats()["active_sessions"] == 50
+        assert controller.get_stats()["tenant_sessions"] == {}
+
+    asyncio.run(scenario())
+
+
+def test_rejects_duplicate_client_id():
+    async def scenario():
+        controller = AdmissionController(max_sessions=1, queue_timeout=5)
+        await controller.acquire("a")
+        with pytest.raises(AdmissionRejected) as active_dup:
+            await controller.acquire("a")
+        assert active_dup.value.reason == "duplicate_session"
+
+        queued = asyncio.create_task(controller.acquire("b"))
+        await _settle()
+        with pytest.raises(AdmissionRejected) as queued_dup:
+            await controller.acquire("b")
+        assert queued_dup.value.reason == "duplicate_session"
+        queued.cancel()
+
+    asyncio.run(scenario())
+
+
+def test_rejects_when_queue_full():
+    async def scenario():
+        controller = AdmissionController(max_sessions=1, max_queue_size=1, queue_timeout=5)
+        await controller.acquire("a")
+        queued = asyncio.create_task(controller.acquire("b"))
+        await _settle()
+        with pytest.raises(AdmissionRejected) as exc:
+            await controller.acquire("c")
+        assert exc.value.reason == "capacity_exhausted"
+        queued.cancel()
+
+    asyncio.run(scenario())
+
+
+def test_queue_timeout_frees_queue_slot():
+    async def scenario():
+        controller = AdmissionController(max_sessions=1, queue_timeout=0.05)
+        await controller.acquire("a")
+        with pytest.raises(AdmissionRejected) as exc:
+            await controller.acquire("b")
+        assert exc.value.reason == "queue_timeout"
+        assert controller.get_stats()["queue_length"] == 0
+
+        controller.release("a")
+        await asyncio.wait_for(controller.acquire("b"), timeout=1)
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_leaves_queue():
+    async def scenario():
+        controller = AdmissionController(max_sessions=1, queue_timeout=5)
+        await controller.acquire("a")
+        queued = asyncio.create_task(controller.acquire("b"))
+        await _settle()
+        queued.cancel()
+        await _settle()
+        assert controller.get_stats()["queue_length"] == 0
+
+        controller.release("a")
+        assert controller.get_stats()["active_sessions"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_token_bucket_rejects_non_positive_rate():
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0, capacity=100)
+
+
+def test_token_bucket_tracks_sustained_overrun():
+    bucket = TokenBucket(rate=10000, capacity=100)
+    assert bucket.consume(100) == 0.0
+    assert bucket.overrun_duration() == 0.0
+
+    # 按限速等待后仍持续超速发送，超速时长应持续累积
+    for _ in range(5):
+        delay = bucket.consume(200)
+        assert delay > 0
+        time.sleep(delay)
+    assert bucket.overrun_duration() >= 0.05
+
+    # 恢复到限速以内后超速状态清零
+    time.sleep(0.05)
+    assert bucket.consume(100) == 0.0
+    assert bucket.overrun_duration() == 0.0
@@ -0,0 +1,112 @@
+"""
+音频预处理DSP处理链测试
+"""
+
+import numpy as np
+
+from services.audio_dsp import AudioDSPChain, INT16_MAX
+
+CHUNK_SAMPLES = 960
+
+
+def _to_pcm(signal: np.ndarray) -> bytes:
+    return np.rint(np.clip(signal, -1.0, 1.0) * INT16_MAX).astype("<i2").tobytes()
+
+
+def _from_pcm(data: bytes) -> np.ndarray:
+    return np.frombuffer(data, dtype="<i2").astype(np.float32) / INT16_MAX
+
+
+def _process_in_chunks(chain: AudioDSPChain, pcm: bytes, chunk_bytes: int = CHUNK_SAMPLES * 2) -> bytes:
+    return b"".join(chain.process(pcm[i:i + chunk_bytes]) for i in range(0, len(pcm), chunk_bytes))
+
+
+def _rms_dbfs(samples: np.ndarray) -> float:
+    return 20 * np.log10(np.sqrt(np.mean(samples * samples)) + 1e-12)
+
+
+def test_passthrough_reconstruction_with_noop_gate():
+    """门限不衰减时，重叠相加应完美重建输入（延迟一个帧移）"""
+    rng = np.random.default_rng(1)
+    x = (rng.standard_normal(16000) * 3000).astype("<i2")
+    chain = AudioDSPChain(dc_removal=False, agc=False, noise_reduction_db=0)
+
+    y = np.frombuffer(_process_in_chunks(chain, x.tobytes()), dtype="<i2")
+
+    delay = chain.hop_length
+    assert y.size == x.size
+    assert np.abs(y[delay:].astype(int) - x[:y.size - delay].astype(int)).max() <= 1
+
+
+def test_odd_byte_chunks_are_carried_over():
+    """奇数字节的音频块应跨块拼接，结果与偶数切分一致（按帧处理的降噪与块划分无关）"""
+    rng = np.random.default_rng(2)
+    pcm = (rng.standard_normal(4800) * 3000).astype("<i2").tobytes()
+
+    def make_chain():
+        return AudioDSPChain(dc_removal=False, agc=False)
+
+    expected = _process_in_chunks(make_chain(), pcm)
+    actual = _process_in_chunks(make_chain(), pcm, chunk_bytes=CHUNK_SAMPLES * 2 + 1)
+
+    assert actual == expected
+
+
+def test_single_byte_chunk_returns_empty():
+    chain = AudioDSPChain()
+    assert chain.process(b"\x01") == b""
+
+
+def test_dc_offset_removed():
+    t = np.arange(16000 * 3) / 16000
+    signal = 0.1 * np.sin(2 * np.pi * 440 * t) + 0.2
+    chain = AudioDSPChain(noise_reduction=False, agc=False)
+
+    y = _from_pcm(_process_in_chunks(chain, _to_pcm(signal)))
+
+    assert abs(float(y[-16000:].mean())) < 0.005
+
+
+def test_agc_does_not_amplify_noise_only_input():
+    """纯噪声输入经过降噪与AGC后不应被放大"""
+    rng = np.random.default_rng(3)
+    noise = rng.standard_normal(16000 * 5)
+    noise *= 10 ** (-40 / 20) / np.sqrt(np.mean(noise * noise))
+    chain = AudioDSPChain()
+
+    y = _from_pcm(_process_in_chunks(chain, _to_pcm(noise)))
+
+    assert _rms_dbfs(y[-16000:]) <= _rms_dbfs(noise[-16000:])
+    assert chain._agc_gain <= 1.0
+
+
+def test_agc_raises_quiet_speech_towards_target():
+    """噪声中的低电平语音（以300ms音节/200ms停顿模拟）应被提升"""
+    rng = np.random.default_rng(4)
+    t = np.arange(16000 * 6) / 16000
+    noise = 10 ** (-60 / 20) * rng.standard_normal(t.size)
+    tone = 10 ** (-40 / 20) * np.sqrt(2) * np.sin(2 * np.pi * 300 * t)
+    speech_on = (t >= 1.0) & ((t % 0.5) < 0.3)
+    signal = noise + tone * speech_on
+    chain = AudioDSPChain()
+
+    y = _from_pcm(_process_in_chunks(chain, _to_pcm(signal)))
+
+    assert chain._agc_gain > 1.0
+    assert _rms_dbfs(y[-16000:]) > _rms_dbfs(signal[-16000:]) + 6
+
+
+def test_agc_does_not_clip_on_quiet_to_loud_step():
+    """低电平语音后突然变响时，峰值限幅应避免任何削波"""
+    rng = np.random.default_rng(5)
+    t = np.arange(16000 * 4) / 16000
+    syllables = (t % 0.5) < 0.3
+    level = np.where(t < 3.0, 10 ** (-40 / 20), 10 ** (-12 / 20))
+    signal = 10 ** (-60 / 20) * rng.standard_normal(t.size)
+    signal += level * np.sqrt(2) * np.sin(2 * np.pi * 300 * t) * syllables
+    chain = AudioDSPChain()
+
+    y = np.frombuffer(_process_in_chunks(chain, _to_pcm(signal)), dtype="<i2")
+
+    assert chain._agc_gain < 1.0
+    assert np.abs(y.astype(int)).max() < 32767
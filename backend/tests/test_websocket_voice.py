@@ -0,0 +1,154 @@
+"""
+语音WebSocket路由的准入与清理流程测试
+"""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("pyaudio")
+
+from fastapi import WebSocketDisconnect
+
+from routers import websocket_voice
+from services.admission_control import AdmissionController
+
+
+class FakeWebSocket:
+    """模拟客户端WebSocket，按队列投递客户端消息"""
+
+    def __init__(self):
+        self.incoming: asyncio.Queue = asyncio.Queue()
+        self.sent = []
+        self.close_reason = None
+
+    async def accept(self):
+        pass
+
+    async def receive(self):
+        message = await self.incoming.get()
+        if isinstance(message, Exception):
+            raise message
+        return message
+
+    async def receive_bytes(self):
+        message = await self.receive()
+        if message["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(1000)
+        return message["bytes"]
+
+    async def send_text(self, data: str):
+        self.sent.append(data)
+
+    async def close(self, code: int = 1000, reason: str = ""):
+        self.close_reason = reason
+
+    def disconnect(self):
+        self.incoming.put_nowait({"type": "websocket.disconnect"})
+
+    def admitted(self) -> bool:
+        return any('"admitted"' in data for data in self.sent)
+
+
+class FakeFunASRService:
+    def __init__(self, disconnect_gate: asyncio.Event):
+        self.disconnect_gate = disconnect_gate
+
+    async def connect(self):
+        return True
+
+    async def start_recognition_session(self, session_name: str):
+        return True
+
+    async def send_audio_chunk(self, audio_data: bytes):
+        return True
+
+    async def disconnect(self):
+        # 模拟FunASR关闭握手缓慢
+        await self.disconnect_gate.wait()
+
+
+@pytest.fixture
+def voice_router(monkeypatch):
+    controller = AdmissionController(max_sessions=1, queue_timeout=5)
+    manager = websocket_voice.ConnectionManager()
+    monkeypatch.setattr(websocket_voice, "admission_controller", controller)
+    monkeypatch.setattr(websocket_voice, "manager", manager)
+    return controller, manager
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_reconnect_not_blocked_by_slow_funasr_close(voice_router):
+    controller, manager = voice_router
+
+    async def scenario():
+        disconnect_gate = asyncio.Event()
+
+        async def fake_service(client_id):
+            service = FakeFunASRService(disconnect_gate)
+            manager.client_funasr_services[client_id] = service
+            return service
+
+        manager.get_or_create_funasr_service = fake_service
+
+        first = FakeWebSocket()
+        first_task = asyncio.create_task(websocket_voice.websocket_voice_stream(first, "client-1"))
+        await _settle()
+        assert first.admitted()
+
+        # 停止录音后立即以相同ID重连，此时旧会话仍在等待FunASR关闭
+        first.disconnect()
+        await _settle()
+        assert not first_task.done()
+
+        second = FakeWebSocket()
+        second_task = asyncio.create_task(websocket_voice.websocket_voice_stream(second, "client-1"))
+        await _settle()
+        assert second.admitted()
+        assert second.close_reason is None
+
+        second.disconnect()
+        disconnect_gate.set()
+        await asyncio.wait_for(asyncio.gather(first_task, second_task), timeout=1)
+        assert controller.get_stats()["active_sessions"] == 0
+        assert manager.active_connections == {}
+
+    asyncio.run(scenario())
+
+
+def test_rejection_close_reason_matches_cause(voice_router):
+    controller, _ = voice_router
+
+    async def scenario():
+        await controller.acquire("client-1")
+        duplicate = FakeWebSocket()
+        await websocket_voice.websocket_voice_stream(duplicate, "client-1")
+        assert duplicate.close_reason == websocket_voice.ADMISSION_CLOSE_REASONS["duplicate_session"]
+
+    asyncio.run(scenario())
+
+
+def test_receive_error_while_queued_releases_queue_slot(voice_router):
+    controller, _ = voice_router
+
+    async def scenario():
+        await controller.acquire("holder")
+        queued = FakeWebSocket()
+        task = asyncio.create_task(websocket_voice.wait_for_admission(queued, "client-2", None))
+        await _settle()
+        assert controller.get_stats()["queue_length"] == 1
+
+        queued.incoming.put_nowait(RuntimeError("broken socket"))
+        with pytest.raises(RuntimeError):
+            await task
+        assert controller.get_stats()["queue_length"] == 0
+
+        # 名额释放后不应准入已离开的客户端
+        controller.release("holder")
+        assert controller.get_stats()["active_sessions"] == 0
+
+    asyncio.run(scenario())
@@ -150,13 +150,15 @@ const VoiceAnalysis = () => {
                 borderRadius: '50%',
                 backgroundColor: connectionStatus === 'connected' ? '#52c41a' : 
                                 connectionStatus === 'service_ready' ? '#1890ff' :
-                                connectionStatus === 'service_fallback' ? '#faad14' : '#f5222d'
+                                connectionStatus === 'service_fallback' ? '#faad14' :
+                                connectionStatus === 'queued' ? '#faad14' : '#f5222d'
               }}
             />
             <Text type="secondary" style={{ fontSize: 12 }}>
               {connectionStatus === 'connected' ? 'WebSocket已连接' :
                connectionStatus === 'service_ready' ? '语音识别已就绪' :
                connectionStatus === 'service_fallback' ? '使用备用服务' :
+               connectionStatus === 'queued' ? '排队中...' :
                connectionStatus === 'disconnected' ? '未连接' : '连接中...'}
             </Text>
           </div>
@@ -6,6 +6,9 @@ import {
   type VoiceAnalysisResult 
 } from './websocketService'
 
+// 排队位置提示的固定key，位置变化时只更新同一条提示
+const QUEUE_MESSAGE_KEY = 'admission_queue'
+
 // 工具函数
 export const extractKeywords = (text: string): string[] => {
   const words = text.replace(/[，。！？；：""''（）【】\s]/g, ' ').split(/\s+/).filter(word => word.length > 1)
@@ -153,7 +156,7 @@ export class VoiceRecordingService {
 
   private setupWebSocketCallbacks() {
     voiceWebSocketService.setCallbacks({
-      onConnectionStatus: (status: string) => {
+      onConnectionStatus: (status: string, detail?: string) => {
         let frontendStatus = status
         if (status === 'funasr_connected') {
           frontendStatus = 'service_ready'
@@ -163,6 +166,13 @@ export class VoiceRecordingService {
         
         this.onConnectionStatusChange?.(frontendStatus)
         
+        // 排队位置只更新同一条提示，准入或断开后关闭
+        if (status === 'queued') {
+          message.loading({ content: detail || '语音识别服务繁忙，排队中', key: QUEUE_MESSAGE_KEY, duration: 0 })
+          return
+        }
+        message.destroy(QUEUE_MESSAGE_KEY)
+        
         const statusMessages: Record<string, string> = {
           'connected': 'WebSocket连接成功',
           'funasr_connected': '语音识别服务已连接',
@@ -36,6 +36,8 @@ export interface WebSocketMessage {
   data?: any;
   message?: string;
   status?: string;
+  position?: number;
+  reason?: string;
   timestamp?: string;
 }
 
@@ -123,11 +125,14 @@ export class VoiceWebSocketService {
   private clientId: string;
   private baseUrl: string;
   private isConnected: boolean = false;
+  // 后端准入控制确认后才允许发送音频
+  private isAdmitted: boolean = false;
+  private admissionResolver?: (admitted: boolean) => void;
   
   // 回调函数
   private onTranscriptionCallback?: (result: TranscriptionResult) => void;
   private onAnalysisCallback?: (result: VoiceAnalysisResult) => void;
-  private onConnectionStatusCallback?: (status: string) => void;
+  private onConnectionStatusCallback?: (status: string, detail?: string) => void;
   private onErrorCallback?: (error: string) => void;
 
   constructor(baseUrl: string = 'ws://localhost:8000') {
@@ -145,7 +150,7 @@ export class VoiceWebSocketService {
   setCallbacks(callbacks: {
     onTranscription?: (result: TranscriptionResult) => void;
     onAnalysis?: (result: VoiceAnalysisResult) => void;
-    onConnectionStatus?: (status: string) => void;
+    onConnectionStatus?: (status: string, detail?: string) => void;
     onError?: (error: string) => void;
   }) {
     this.onTranscriptionCallback = callbacks.onTranscription;
@@ -155,10 +160,13 @@ export class VoiceWebSocketService {
   }
 
   /**
-   * 连接到WebSocket服务
+   * 连接到WebSocket服务，后端准入（可能需要排队）后才返回true
    */
   async connect(): Promise<boolean> {
     try {
+      // 每次连接使用新的客户端ID，避免旧会话尚未清理完时重连被判定为重复会话
+      this.clientId = this.generateClientId();
+      
       // 连接主音频流WebSocket
       const audioStreamUrl = `${this.baseUrl}/api/ws/voice/stream/${this.clientId}`;
       this.audioStreamWs = new WebSocket(audioStreamUrl);
@@ -169,11 +177,14 @@ export class VoiceWebSocketService {
           return;
         }
 
+        this.admissionResolver = (admitted: boolean) => {
+          this.admissionResolver = undefined;
+          resolve(admitted);
+        };
+
         this.audioStreamWs.onopen = () => {
-          console.log('音频流WebSocket连接成功');
+          console.log('音频流WebSocket连接成功，等待服务准入');
           this.isConnected = true;
-          this.onConnectionStatusCallback?.('connected');
-          resolve(true);
         };
 
         this.audioStreamWs.onmessage = (event) => {
@@ -183,6 +194,8 @@ export class VoiceWebSocketService {
         this.audioStreamWs.onclose = () => {
           console.log('音频流WebSocket连接关闭');
           this.isConnected = false;
+          this.isAdmitted = false;
+          this.admissionResolver?.(false);
           this.onConnectionStatusCallback?.('disconnected');
         };
 
@@ -228,6 +241,19 @@ export class VoiceWebSocketService {
           this.onConnectionStatusCallback?.(message.status || 'unknown');
           break;
           
+        case 'admission_status':
+          // 后端准入控制：排队中推送位置，准入后才开始录音，容量不足时拒绝连接
+          if (message.status === 'admitted') {
+            this.isAdmitted = true;
+            this.admissionResolver?.(true);
+          } else if (message.status === 'rejected') {
+            this.onErrorCallback?.(message.message || '语音识别服务繁忙，请稍后再试');
+            this.admissionResolver?.(false);
+          } else {
+            this.onConnectionStatusCallback?.(message.status || 'unknown', message.message);
+          }
+          break;
+
         case 'transcription':
           if (message.data && this.onTranscriptionCallback) {
             this.onTranscriptionCallback(message.data as TranscriptionResult);
@@ -261,8 +287,8 @@ export class VoiceWebSocketService {
    * 发送音频数据
    */
   sendAudioData(audioData: ArrayBuffer): boolean {
-    if (!this.isConnected || !this.audioStreamWs) {
-      console.warn('WebSocket未连接，无法发送音频数据');
+    if (!this.isConnected || !this.isAdmitted || !this.audioStreamWs) {
+      console.warn('WebSocket未连接或未获准入，无法发送音频数据');
       return false;
     }
 
@@ -291,6 +317,7 @@ export class VoiceWebSocketService {
    */
   disconnect() {
     this.isConnected = false;
+    this.isAdmitted = false;
     
     if (this.audioStreamWs) {
       this.audioStreamWs.close();